@@ -0,0 +1,73 @@
+"""Замер памяти на один отслеживаемый сервер: прежнее и компактное представление.
+
+Запуск: python bench_memory.py [количество_серверов] [игроков_на_сервере]
+"""
+import os
+import sys
+import tracemalloc
+
+# bot.py читает настройки при импорте, для замера токен и канал не нужны
+os.environ.setdefault('DELIVERY_MODE', 'webhook')
+os.environ.setdefault('STATUS_WEBHOOK_URL', 'https://discord.com/api/webhooks/0/bench')
+
+import a2s
+from bot import GModServer
+from player_roster import PlayerRoster
+
+SERVERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+PLAYERS = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+class LegacyServer:
+    """Прежний GModServer: атрибуты в __dict__, игроки как объекты a2s.Player"""
+    def __init__(self):
+        self.address = None
+        self.port = None
+        self.status_message = None
+        self.last_player_count = 0
+        self.last_change_time = None
+        self.server_name = None
+        self.message_id = None
+        self.channel_id = None
+        self.players = []
+
+def make_players(server_index):
+    return [
+        a2s.Player(index=i, name=f"Player_{server_index}_{i}", score=i * 3, duration=60.0 * i)
+        for i in range(PLAYERS)
+    ]
+
+def build_legacy():
+    servers = []
+    for n in range(SERVERS):
+        server = LegacyServer()
+        server.address, server.port = f"10.0.{n // 256}.{n % 256}", 27015
+        server.players = make_players(n)
+        servers.append(server)
+    return servers
+
+def build_compact():
+    servers = []
+    for n in range(SERVERS):
+        server = GModServer()
+        server.set_server(f"10.0.{n // 256}.{n % 256}", 27015)
+        server.roster = PlayerRoster.from_players(make_players(n))
+        servers.append(server)
+    return servers
+
+def measure(builder):
+    """Возвращает объем памяти на один сервер в байтах"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    servers = builder()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del servers
+    return used / SERVERS
+
+if __name__ == '__main__':
+    legacy = measure(build_legacy)
+    compact = measure(build_compact)
+    print(f"Серверов: {SERVERS}, игроков на сервере: {PLAYERS}")
+    print(f"До (dict + a2s.Player):        {legacy / 1024:8.1f} КБ на сервер")
+    print(f"После (__slots__ + массивы):   {compact / 1024:8.1f} КБ на сервер")
+    print(f"Экономия: {(1 - compact / legacy) * 100:.0f}%")
\ No newline at end of file
@@ -1,30 +1,70 @@
+import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 import a2s
 import os
+import signal
+import sys
 from dotenv import load_dotenv
 import asyncio
+import hashlib
 import socket
+import time
+import zlib
 from datetime import datetime
 import pytz
 from server_state import ServerState
+from player_roster import PlayerRoster
+from player_history import PlayerHistory
+from player_index import PlayerIndex
+from tick_profiler import TickProfiler
+from playtime import ALL_SERVERS, PlaytimeTracker
+from event_bus import ServerSnapshot, SnapshotBus
+from status_api import StatusAPI
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Загрузка переменных окружения
 load_dotenv()
 
 # Загрузка настроек из .env
 TOKEN = os.getenv('DISCORD_TOKEN')
-STATUS_CHANNEL_ID = int(os.getenv('STATUS_CHANNEL_ID'))
-ADMIN_ROLE_ID = int(os.getenv('ADMIN_ROLE_ID'))
+# В режиме вебхука канал и роль не используются, поэтому обязательны только для gateway
+STATUS_CHANNEL_ID = int(os.getenv('STATUS_CHANNEL_ID', '0'))
+ADMIN_ROLE_ID = int(os.getenv('ADMIN_ROLE_ID', '0'))
 UPDATE_INTERVAL = int(os.getenv('UPDATE_INTERVAL', '10'))
 MAX_PLAYERS_SHOW = int(os.getenv('MAX_PLAYERS_SHOW', '30'))
 BOT_STATUS = os.getenv('BOT_STATUS', 'губешкой')
 INFO_TIMEOUT = float(os.getenv('INFO_TIMEOUT', '3.0'))
 PLAYERS_TIMEOUT = float(os.getenv('PLAYERS_TIMEOUT', '7.0'))
+LEAN_MODE = os.getenv('LEAN_MODE', 'false').lower() in ('1', 'true', 'yes')
+RESOURCE_LOG_INTERVAL = int(os.getenv('RESOURCE_LOG_INTERVAL', '600'))
+RULES_TTL = int(os.getenv('RULES_TTL', '1800'))
+STATE_SAVE_INTERVAL = int(os.getenv('STATE_SAVE_INTERVAL', '60'))
+HISTORY_SIZE = int(os.getenv('HISTORY_SIZE', '360'))
+STATUS_API_HOST = os.getenv('STATUS_API_HOST', '127.0.0.1')
+STATUS_API_PORT = int(os.getenv('STATUS_API_PORT', '0'))
+DELIVERY_MODE = os.getenv('DELIVERY_MODE', 'gateway').lower()
+STATUS_WEBHOOK_URL = os.getenv('STATUS_WEBHOOK_URL')
+NOTIFY_WEBHOOK_URL = os.getenv('NOTIFY_WEBHOOK_URL')
+FIND_RESULTS_LIMIT = int(os.getenv('FIND_RESULTS_LIMIT', '20'))
+PROFILE_TICKS = int(os.getenv('PROFILE_TICKS', '3'))
+TOP_SIZE = int(os.getenv('TOP_SIZE', '25'))
+DISCORD_WORKERS = int(os.getenv('DISCORD_WORKERS', '4'))
+IMPORT_PROBE_TIMEOUT = float(os.getenv('IMPORT_PROBE_TIMEOUT', '2.0'))
+IMPORT_MAX_SERVERS = int(os.getenv('IMPORT_MAX_SERVERS', '200'))
 
-if TOKEN is None:
+if DELIVERY_MODE == 'webhook':
+    if not STATUS_WEBHOOK_URL:
+        raise ValueError("STATUS_WEBHOOK_URL не найден в файле .env!")
+elif TOKEN is None:
     raise ValueError("Токен Discord не найден в файле .env!")
+elif not STATUS_CHANNEL_ID or not ADMIN_ROLE_ID:
+    raise ValueError("STATUS_CHANNEL_ID и ADMIN_ROLE_ID обязательны в режиме gateway!")
 
 # ANSI цвета
 COLORS = {
@@ -38,7 +78,46 @@ COLORS = {
     'reset': '\u001b[0m'
 }
 
+def get_content_hash(message):
+    """Хэш содержимого сообщения без строк со временем, которые меняются при каждом обновлении"""
+    stable_lines = [
+        line for line in message.split("\n")
+        if "Последнее изменение" not in line and "Данные были обновлены" not in line
+    ]
+    return hashlib.sha1("\n".join(stable_lines).encode('utf-8')).hexdigest()
+
+def get_current_memory():
+    """Текущая резидентная память процесса в МБ или None, если /proc недоступен"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def log_resource_usage(stage):
+    """Выводит потребление памяти и процессорного времени процессом"""
+    mode = "lean" if LEAN_MODE else "обычный"
+    cpu_time = time.process_time()
+    current_memory = get_current_memory()
+    if current_memory is not None:
+        memory_info = f"память {current_memory:.1f} МБ"
+    else:
+        memory_info = "память: недоступно"
+    if resource is not None:
+        # ru_maxrss только растет; в macOS он в байтах, в Linux в килобайтах
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        memory_info += f" (пик {peak_memory:.1f} МБ)"
+    print(f"[Ресурсы] {stage} (режим {mode}): {memory_info}, процессорное время {cpu_time:.1f} сек.")
+
 class GModServer:
+    __slots__ = (
+        'address', 'port', 'status_message', 'last_player_count', 'last_change_time',
+        'server_name', 'message_id', 'channel_id', 'roster', 'snapshot', 'history',
+        'content_hash', 'warm_restart', 'online',
+        'rules', 'rules_map', 'rules_fetched_at'
+    )
+
     def __init__(self):
         self.address = None
         self.port = None
@@ -48,6 +127,15 @@ class GModServer:
         self.server_name = None
         self.message_id = None
         self.channel_id = None
+        self.roster = PlayerRoster()
+        self.snapshot = None
+        self.history = PlayerHistory(HISTORY_SIZE)
+        self.content_hash = None
+        self.warm_restart = False
+        self.online = None
+        self.rules = {}
+        self.rules_map = None
+        self.rules_fetched_at = None
 
     def set_server(self, address, port):
         """Настройка сервера с сохранением текущего имени"""
@@ -58,6 +146,15 @@ class GModServer:
         self.last_player_count = 0
         self.last_change_time = None
         self.server_name = old_name
+        self.roster = PlayerRoster()
+        self.snapshot = None
+        self.history = PlayerHistory(HISTORY_SIZE)
+        self.content_hash = None
+        self.warm_restart = False
+        self.online = None
+        self.rules = {}
+        self.rules_map = None
+        self.rules_fetched_at = None
 
     def is_configured(self):
         return self.address is not None and self.port is not None
@@ -74,10 +171,80 @@ class GModServer:
         if name:
             self.server_name = name
 
-    def format_player_info(self, player):
+    def rules_need_refresh(self, map_name):
+        """Правила запрашиваются редко: по истечении RULES_TTL или при смене карты"""
+        if self.rules_fetched_at is None or map_name != self.rules_map:
+            return True
+        return time.monotonic() - self.rules_fetched_at >= RULES_TTL
+
+    def update_rules(self, rules, map_name):
+        """Сохраняет правила сервера, возвращает True если они изменились"""
+        changed = rules != self.rules
+        self.rules = rules
+        self.rules_map = map_name
+        self.rules_fetched_at = time.monotonic()
+        return changed
+
+    def postpone_rules_refresh(self, map_name):
+        """После неудачного запроса оставляет прежние правила до следующего TTL"""
+        self.rules_map = map_name
+        self.rules_fetched_at = time.monotonic()
+
+    def get_gamemode(self, fallback=None):
+        """Режим игры из правил сервера или из поля game в A2S_INFO"""
+        return self.rules.get('gamemode') or fallback
+
+    def get_workshop_collection_url(self):
+        """Ссылка на коллекцию мастерской, если сервер ее сообщает"""
+        collection = self.rules.get('host_workshop_collection') or self.rules.get('workshop_collection')
+        if not collection or collection == '0':
+            return None
+        return f"https://steamcommunity.com/sharedfiles/filedetails/?id={collection}"
+
+    def build_snapshot(self, server_info, polled_at):
+        """Снимок сервера для HTTP API и файла состояния по результату опроса"""
+        online = server_info is not None
+        return {
+            'server_id': f"{self.address}:{self.port}",
+            'online': online,
+            'server_name': self.server_name,
+            'map': server_info.map_name if online else None,
+            'gamemode': self.get_gamemode(server_info.game) if online else None,
+            'workshop_collection': self.get_workshop_collection_url() if online else None,
+            'players': server_info.player_count if online else 0,
+            'max_players': server_info.max_players if online else None,
+            'last_change': self.last_change_time.isoformat() if self.last_change_time else None,
+            'updated_at': datetime.fromtimestamp(polled_at).isoformat()
+        }
+
+    def record_snapshot(self, server_info, polled_at):
+        """Запоминает последний снимок сервера и добавляет точку в историю"""
+        self.snapshot = self.build_snapshot(server_info, polled_at)
+        self.history.append(int(polled_at), self.snapshot['players'])
+
+    def to_state(self, status):
+        """Данные для сохранения между перезапусками"""
+        return {
+            "last_player_count": self.last_player_count,
+            "last_change_time": self.last_change_time.isoformat() if self.last_change_time else None,
+            "status": status
+        }
+
+    def restore_state(self, state):
+        """Восстанавливает данные, сохраненные до перезапуска"""
+        if not state:
+            return
+        self.last_player_count = state.get("last_player_count", 0)
+        if state.get("last_change_time"):
+            self.last_change_time = datetime.fromisoformat(state["last_change_time"])
+        self.content_hash = state.get("content_hash")
+        self.snapshot = state.get("status")
+        self.warm_restart = True
+
+    def format_player_info(self, name, duration):
         """Форматирование информации об игроке"""
-        minutes = int(player.duration//60)
-        return f"║ {COLORS['yellow']}{minutes:3d} мин.{COLORS['reset']} | {COLORS['cyan']}{player.name}{COLORS['reset']}\n"
+        minutes = int(duration//60)
+        return f"║ {COLORS['yellow']}{minutes:3d} мин.{COLORS['reset']} | {COLORS['cyan']}{name}{COLORS['reset']}\n"
 
     def format_long_text(self, text, max_length=75):
         """Форматирует длинный текст, разбивая его на строки"""
@@ -125,19 +292,130 @@ class GModServer:
             hours = int(diff.total_seconds() // 3600)
             return f"Последнее изменение: {hours} ч. назад"
 
+    def render_offline_message(self):
+        """Формирует сообщение для недоступного сервера"""
+        server_url = self.get_server_url()
+        # Для оффлайн режима используем длинную рамку
+        message = "```ansi\n"
+        header = message + "╔═══════════════════════════════════════════════════════════════════════════════════╗\n"
+        header += "║                              \u001b[1;33mИнформация о сервере\u001b[0m                                 ║\n"
+        header += "╠═══════════════════════════════════════════════════════════════════════════════════╣\n"
+        header += f"║ \u001b[1;36mНазвание:\u001b[0m \u001b[1;34m{server_url}\u001b[0m\n"
+        header += f"║ \u001b[1;36mIP:\u001b[0m {self.address}:{self.port}\n"
+        header += f"║ \u001b[1;36mСтатус:\u001b[0m \u001b[1;31mОффлайн\u001b[0m\n"
+        header += "╠═══════════════════════════════════════════════════════════════════════════════════╣\n"
+        header += "║                                \u001b[1;33mСтатус сервера\u001b[0m                                     ║\n"
+        header += "╠═══════════════════════════════════════════════════════════════════════════════════╣\n"
+        header += "║ \u001b[1;31mСервер временно недоступен\u001b[0m\n"
+        header += f"║ \u001b[1;31mДанные были обновлены: {datetime.now(pytz.timezone('Europe/Moscow')).strftime('%H:%M:%S')}\u001b[0m\n"
+        footer = "╚═══════════════════════════════════════════════════════════════════════════════════╝\n```"
+        return header + footer
+
+    def render_status_message(self, server_info, roster, players_changed):
+        """Формирует сообщение со статусом и списком игроков"""
+        message = "```ansi\n"
+        header = message + "╔════════════════════════════════════════════╗\n"
+        header += "║          \u001b[1;33mИнформация о сервере\u001b[0m              ║\n"
+        header += "╠════════════════════════════════════════════╣\n"
+        players_info = ""
+        footer = "╚════════════════════════════════════════════╝\n```"
+
+        change_message = ""
+        if players_changed:
+            change_type = "➕" if server_info.player_count > self.last_player_count else "➖"
+            change_message = f"║ \u001b[1;35m{change_type} Количество игроков изменилось\u001b[0m\n"
+        
+        header += f"║ \u001b[1;36mНазвание:\u001b[0m {server_info.server_name}\n"
+        header += f"║ \u001b[1;36mКарта:\u001b[0m {server_info.map_name}\n"
+        gamemode = self.get_gamemode(server_info.game)
+        if gamemode:
+            header += f"║ \u001b[1;36mРежим:\u001b[0m {gamemode}\n"
+        collection_url = self.get_workshop_collection_url()
+        if collection_url:
+            header += f"║ \u001b[1;36mКоллекция:\u001b[0m {collection_url}\n"
+        header += f"║ \u001b[1;32mIP:\u001b[0m {self.address}:{self.port}\n"
+        header += f"║ \u001b[1;32mИгроки:\u001b[0m {server_info.player_count}/{server_info.max_players}\n"
+        header += f"║ {self.format_time_since_change()}\n"
+        header += "╠════════════════════════════════════════════╣\n"
+        
+        if roster:
+            players_info += "║            \u001b[1;33mСписок игроков\u001b[0m                  ║\n"
+            players_info += "╠════════════════════════════════════════════╣\n"
+            temp_players_info = ""
+            displayed_count = 0
+            remaining_players = len(roster)
+            
+            for name, _, duration in roster:
+                player_line = self.format_player_info(name, duration)
+                message_length = self.calculate_message_length(header, players_info + temp_players_info + player_line + change_message, footer)
+                
+                if message_length >= 1900 or displayed_count >= MAX_PLAYERS_SHOW:
+                    remaining_players = len(roster) - displayed_count
+                    break
+                
+                temp_players_info += player_line
+                displayed_count += 1
+            
+            players_info += temp_players_info
+            
+            if remaining_players > displayed_count:
+                players_info += "╠════════════════════════════════════════════╣\n"
+                players_info += f"║ \u001b[1;35mИ ещё {remaining_players - displayed_count} игроков\u001b[0m\n"
+            
+            if change_message:
+                players_info += "║\n"
+                players_info += change_message
+        else:
+            players_info += "║ \u001b[1;31mСервер пуст\u001b[0m\n"
+
+        return header + players_info + footer
+
 class GModBot(commands.Bot):
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        super().__init__(command_prefix='/', intents=intents)
+        if LEAN_MODE:
+            # Для slash-команд и редактирования сообщений достаточно guilds
+            intents = discord.Intents.none()
+            intents.guilds = True
+            options = {
+                'max_messages': None,
+                'member_cache_flags': discord.MemberCacheFlags.none(),
+                'chunk_guilds_at_startup': False,
+            }
+        else:
+            intents = discord.Intents.default()
+            intents.message_content = True
+            options = {}
+        super().__init__(command_prefix='/', intents=intents, **options)
         self.servers = {}
         self.server_state = ServerState()
+        self.servers_restored = None
+        self.check_tasks = {}
+        self.player_index = PlayerIndex()
+        self.profiler = TickProfiler()
+        self.playtime = PlaytimeTracker(top_size=TOP_SIZE)
+        self.bus = SnapshotBus()
+        self.bus.subscribe("discord", self.render_status, workers=DISCORD_WORKERS)
+        self.bus.subscribe("history", self.record_history)
+        self.bus.subscribe("players", self.index_players)
+        self.bus.subscribe("persistence", self.persist_snapshot)
+        if NOTIFY_WEBHOOK_URL:
+            self.bus.subscribe("notifications", self.notify_changes, changes_only=True)
+        self.status_api = StatusAPI(STATUS_API_HOST, STATUS_API_PORT) if STATUS_API_PORT else None
+        self.webhook = None
+        self.webhook_session = None
+        self.notify_webhook = None
+        self.notify_session = None
+        self.server_availability = {}
         self.add_commands()
         
     def get_server_id(self, address, port):
         """Генерирует уникальный ID сервера"""
         return f"{address}:{port}"
 
+    def get_server_phase(self, server_id):
+        """Детерминированный сдвиг опроса сервера внутри интервала обновления"""
+        return zlib.crc32(server_id.encode('utf-8')) / 2**32 * UPDATE_INTERVAL
+
     def add_server(self, address, port):
         """Добавляет новый сервер для мониторинга"""
         server_id = self.get_server_id(address, port)
@@ -149,6 +427,72 @@ class GModBot(commands.Bot):
         self.servers[server_id] = server
         return True, "Сервер успешно добавлен"
 
+    def parse_server_list(self, text):
+        """Разбирает список адресов ip:port, разделенных переносами строк, пробелами или запятыми"""
+        candidates = []
+        invalid = []
+        seen = set()
+        for entry in text.replace(',', ' ').split():
+            try:
+                address, port = entry.split(':')
+                port = int(port)
+                if not address or not 0 < port < 65536:
+                    raise ValueError
+            except ValueError:
+                invalid.append(entry)
+                continue
+            server_id = self.get_server_id(address, port)
+            if server_id not in seen:
+                seen.add(server_id)
+                candidates.append((address, port))
+        return candidates, invalid
+
+    async def probe_server(self, address, port):
+        """Быстро проверяет доступность сервера, возвращает информацию или None"""
+        try:
+            return await a2s.ainfo((address, port), timeout=IMPORT_PROBE_TIMEOUT)
+        except (asyncio.TimeoutError, socket.timeout, OSError, a2s.BrokenMessageError):
+            return None
+        except Exception as e:
+            # Например, UnicodeError для слишком длинного имени хоста: одна плохая строка
+            # не должна прерывать весь импорт
+            print(f"[Импорт] Ошибка при проверке сервера {address}:{port}: {e}")
+            return None
+
+    async def import_servers(self, text):
+        """Проверяет список серверов параллельно и добавляет только доступные"""
+        parsed, invalid = self.parse_server_list(text)
+        candidates = []
+        duplicates = []
+        for address, port in parsed:
+            server_id = self.get_server_id(address, port)
+            if server_id in self.servers:
+                duplicates.append(server_id)
+            else:
+                candidates.append((address, port))
+        # Адреса сверх лимита не проверяются, но попадают в отчет
+        skipped = [self.get_server_id(address, port) for address, port in candidates[IMPORT_MAX_SERVERS:]]
+        candidates = candidates[:IMPORT_MAX_SERVERS]
+
+        results = await asyncio.gather(*(self.probe_server(address, port) for address, port in candidates))
+
+        added = {}
+        unreachable = []
+        for (address, port), info in zip(candidates, results):
+            server_id = self.get_server_id(address, port)
+            if info is None:
+                unreachable.append(server_id)
+                continue
+            success, _ = self.add_server(address, port)
+            if success:
+                self.servers[server_id].update_server_name(info.server_name)
+                added[server_id] = info.server_name
+
+        # Одна запись файла состояния на весь импорт
+        if added:
+            self.server_state.register_servers(added, STATUS_CHANNEL_ID)
+        return added, unreachable, duplicates, invalid, skipped
+
     def remove_server(self, address, port):
         """Удаляет сервер из мониторинга"""
         server_id = self.get_server_id(address, port)
@@ -156,9 +500,17 @@ class GModBot(commands.Bot):
             return False, "Этот сервер не отслеживается"
         
         server = self.servers[server_id]
+        task = self.check_tasks.pop(server_id, None)
+        if task and not task.done():
+            task.cancel()
         if server.status_message:
             asyncio.create_task(server.status_message.delete())
         
+        if self.status_api:
+            self.status_api.forget(server_id)
+        self.player_index.remove(server_id)
+        self.server_availability.pop(server_id, None)
+
         # Удаляем информацию о сервере из состояния
         self.server_state.remove_server(server_id)
         del self.servers[server_id]
@@ -185,6 +537,123 @@ class GModBot(commands.Bot):
                     ephemeral=True
                 )
 
+        @self.tree.command(name="import", description="Добавить список серверов для мониторинга")
+        @app_commands.describe(
+            servers="Адреса ip:port через пробел, запятую или с новой строки",
+            file="Текстовый файл со списком адресов ip:port"
+        )
+        async def import_command(interaction: discord.Interaction, servers: str = None, file: discord.Attachment = None):
+            if not self.has_admin_role(interaction.user):
+                await interaction.response.send_message("❌ У вас нет прав!", ephemeral=True)
+                return
+
+            if not servers and not file:
+                await interaction.response.send_message(
+                    "❌ Укажите список серверов или приложите файл",
+                    ephemeral=True
+                )
+                return
+
+            # Проверка серверов занимает больше времени, чем дает Discord на ответ
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+            text = servers or ""
+            if file:
+                try:
+                    text += "\n" + (await file.read()).decode('utf-8', errors='replace')
+                except discord.HTTPException as e:
+                    await interaction.followup.send(f"❌ Не удалось прочитать файл: {e}", ephemeral=True)
+                    return
+
+            added, unreachable, duplicates, invalid, skipped = await self.import_servers(text)
+
+            report = f"📥 Импорт серверов: добавлено {len(added)}, недоступно {len(unreachable)}, " \
+                     f"уже отслеживается {len(duplicates)}, неверный формат {len(invalid)}, " \
+                     f"пропущено (лимит) {len(skipped)}\n"
+            report += "".join(f"✅ {server_id} - {name}\n" for server_id, name in added.items())
+            report += "".join(f"❌ {server_id} - недоступен\n" for server_id in unreachable)
+            report += "".join(f"⚠️ {entry} - неверный формат\n" for entry in invalid)
+            report += "".join(f"⏭️ {server_id} - пропущено (лимит)\n" for server_id in skipped)
+            if len(report) > 1900:
+                report = report[:1900] + "\n..."
+            await interaction.followup.send(report, ephemeral=True)
+
+        @self.tree.command(name="find", description="Найти игрока на отслеживаемых серверах")
+        @app_commands.describe(player="Имя игрока или его часть")
+        async def find_command(interaction: discord.Interaction, player: str):
+            if not self.has_admin_role(interaction.user):
+                await interaction.response.send_message("❌ У вас нет прав!", ephemeral=True)
+                return
+
+            # Поиск идет по индексу последних списков игроков, без запросов к серверам
+            results = self.player_index.search(player, limit=FIND_RESULTS_LIMIT)
+            if not results:
+                await interaction.response.send_message(f"ℹ️ Игрок «{player}» не найден", ephemeral=True)
+                return
+
+            lines = []
+            for name, server_ids in results:
+                servers = []
+                for server_id in server_ids:
+                    server = self.servers.get(server_id)
+                    servers.append(f"{server_id} ({server.server_name})" if server and server.server_name else server_id)
+                lines.append(f"👤 {name} - {', '.join(servers)}")
+            report = f"🔎 Результаты поиска «{player}»:\n" + "\n".join(lines)
+            if len(report) > 1900:
+                report = report[:1900] + "\n..."
+            await interaction.response.send_message(report, ephemeral=True)
+
+        @self.tree.command(name="profile", description="Профилировать следующие циклы обновления")
+        @app_commands.describe(
+            ticks="Количество циклов обновления",
+            cprofile="Добавить в отчет самые затратные функции (cProfile)"
+        )
+        async def profile_command(interaction: discord.Interaction, ticks: app_commands.Range[int, 1, 10] = 1, cprofile: bool = False):
+            if not self.has_admin_role(interaction.user):
+                await interaction.response.send_message("❌ У вас нет прав!", ephemeral=True)
+                return
+
+            if self.profiler.active:
+                await interaction.response.send_message("❌ Профилирование уже запущено", ephemeral=True)
+                return
+
+            result = self.profiler.start(ticks, use_cprofile=cprofile)
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            try:
+                # Последняя проверка цикла начинается не позже, чем через интервал после его начала
+                summary, path = await asyncio.wait_for(result, timeout=(ticks + 1) * UPDATE_INTERVAL + 60)
+            except asyncio.TimeoutError:
+                self.profiler.cancel()
+                await interaction.followup.send("❌ Циклы обновления не завершились вовремя", ephemeral=True)
+                return
+
+            if len(summary) > 1800:
+                summary = summary[:1800] + "\n..."
+            await interaction.followup.send(f"📊 Полный отчет: `{path}`\n```\n{summary}\n```", ephemeral=True)
+
+        @self.tree.command(name="top", description="Показать игроков с наибольшим временем игры")
+        @app_commands.describe(
+            server_address="Сервер ip:port, по умолчанию все сервера",
+            count="Количество игроков"
+        )
+        async def top_command(interaction: discord.Interaction, server_address: str = None, count: app_commands.Range[int, 1, 25] = 10):
+            if not self.has_admin_role(interaction.user):
+                await interaction.response.send_message("❌ У вас нет прав!", ephemeral=True)
+                return
+
+            top = self.playtime.get_top(server_address or ALL_SERVERS, min(count, TOP_SIZE))
+            if not top:
+                await interaction.response.send_message("ℹ️ Нет данных о времени игры", ephemeral=True)
+                return
+
+            title = server_address or "всех серверах"
+            lines = [
+                f"{place}. {name} - {int(seconds // 3600)} ч. {int(seconds % 3600 // 60)} мин."
+                for place, (name, seconds) in enumerate(top, start=1)
+            ]
+            report = f"🏆 Время игры на {title}:\n" + "\n".join(lines)
+            await interaction.response.send_message(report[:2000], ephemeral=True)
+
         @self.tree.command(name="stop", description="Остановить мониторинг сервера")
         async def stop_command(interaction: discord.Interaction, server_address: str):
             if not self.has_admin_role(interaction.user):
@@ -227,18 +696,88 @@ class GModBot(commands.Bot):
 
     @tasks.loop(seconds=UPDATE_INTERVAL)
     async def update_status(self):
-        """Обновляет статус всех серверов"""
+        """Распределяет обновление статуса серверов по интервалу"""
+        profiled_tick = self.profiler.begin_tick()
+        loop = asyncio.get_running_loop()
+        tick_start = loop.time()
+        tick_checks = []
         servers_copy = dict(self.servers)
         for server_id, server in servers_copy.items():
-            try:
-                print(f"\n[Обновление] Начало обновления для сервера {server_id}")
-                await self.check_server_status(server)
-            except Exception as e:
-                print(f"[Ошибка] При обновлении сервера {server_id}: {e}")
+            # Сдвиг отсчитывается от начала цикла, поэтому каждый сервер опрашивается
+            # раз в интервал, сколько бы ни длилась его предыдущая проверка
+            started = loop.create_future()
+            loop.call_at(tick_start + self.get_server_phase(server_id), self.start_server_check, server_id, server, started)
+            tick_checks.append(started)
+
+        if profiled_tick is not None:
+            asyncio.create_task(self.finish_profiled_tick(tick_checks, profiled_tick))
+
+    def start_server_check(self, server_id, server, started):
+        """Запускает проверку сервера в его момент внутри интервала, если предыдущая завершена"""
+        task = None
+        # Сервер мог быть удален, пока проверка ждала своей очереди
+        if self.servers.get(server_id) is server:
+            previous = self.check_tasks.get(server_id)
+            if previous and not previous.done():
+                print(f"[Обновление] Предыдущая проверка сервера {server_id} ещё не завершена, пропускаем")
+            else:
+                task = asyncio.create_task(self.run_server_check(server_id, server))
+                self.check_tasks[server_id] = task
+        started.set_result(task)
+
+    async def finish_profiled_tick(self, tick_checks, profiled_tick):
+        """Завершает профилируемый цикл, когда опрос и подписчики шины обработали его снимки"""
+        tick_tasks = [task for task in await asyncio.gather(*tick_checks) if task is not None]
+        await asyncio.gather(*tick_tasks, return_exceptions=True)
+        await self.bus.join()
+        self.profiler.finish_tick(profiled_tick)
+
+    @update_status.before_loop
+    async def before_update_status(self):
+        """Откладывает первое обновление до восстановления серверов"""
+        if DELIVERY_MODE != 'webhook':
+            await self.wait_until_ready()
+        await self.servers_restored.wait()
+
+    @tasks.loop(seconds=RESOURCE_LOG_INTERVAL)
+    async def report_resources(self):
+        """Периодически выводит потребление ресурсов в установившемся режиме"""
+        log_resource_usage("Работа")
+
+    @report_resources.before_loop
+    async def before_report_resources(self):
+        """Пропускает замер до готовности бота"""
+        if DELIVERY_MODE != 'webhook':
+            await self.wait_until_ready()
+
+    async def run_server_check(self, server_id, server):
+        """Проверяет сервер, не пропуская ошибки в цикл обновления"""
+        try:
+            print(f"\n[Обновление] Начало обновления для сервера {server_id}")
+            await self.check_server_status(server)
+        except Exception as e:
+            print(f"[Ошибка] При обновлении сервера {server_id}: {e}")
+
+    @tasks.loop(seconds=STATE_SAVE_INTERVAL)
+    async def save_snapshots(self):
+        """Периодически сохраняет последние снимки серверов в файл состояния"""
+        phase_start = self.profiler.start_phase()
+        self.server_state.save_state()
+        self.playtime.save_state()
+        self.profiler.end_phase("Файл состояния", 'state', phase_start)
 
     async def setup_hook(self):
+        self.servers_restored = asyncio.Event()
+        self.open_notify_webhook()
+        self.bus.start()
         print("Запуск задачи обновления статуса...")
         self.update_status.start()
+        self.report_resources.start()
+        self.save_snapshots.start()
+        self.install_profile_signal()
+        if self.status_api:
+            await self.status_api.start()
+            print(f"HTTP API статуса запущен на {STATUS_API_HOST}:{STATUS_API_PORT}")
         print("Синхронизация команд...")
         try:
             synced = await self.tree.sync()
@@ -246,6 +785,133 @@ class GModBot(commands.Bot):
         except Exception as e:
             print(f"Ошибка при синхронизации команд: {e}")
 
+    async def run_headless(self):
+        """Обновляет статус через вебхук канала без подключения к gateway"""
+        self.webhook_session = aiohttp.ClientSession()
+        self.webhook = discord.Webhook.from_url(STATUS_WEBHOOK_URL, session=self.webhook_session)
+        self.servers_restored = asyncio.Event()
+        self.open_notify_webhook()
+        self.bus.start()
+        self.restore_servers()
+        log_resource_usage("Запуск")
+
+        print("Запуск задачи обновления статуса через вебхук...")
+        self.update_status.start()
+        self.report_resources.start()
+        self.save_snapshots.start()
+        self.install_profile_signal()
+        if self.status_api:
+            await self.status_api.start()
+            print(f"HTTP API статуса запущен на {STATUS_API_HOST}:{STATUS_API_PORT}")
+        try:
+            await self.update_status.get_task()
+        finally:
+            self.update_status.cancel()
+            self.report_resources.cancel()
+            self.bus.stop()
+            self.save_snapshots.cancel()
+            self.server_state.save_state()
+            self.playtime.save_state()
+            if self.status_api:
+                await self.status_api.stop()
+            if self.notify_session:
+                await self.notify_session.close()
+            await self.webhook_session.close()
+
+    def open_notify_webhook(self):
+        """Подключает вебхук канала уведомлений, если он задан"""
+        if NOTIFY_WEBHOOK_URL:
+            self.notify_session = aiohttp.ClientSession()
+            self.notify_webhook = discord.Webhook.from_url(NOTIFY_WEBHOOK_URL, session=self.notify_session)
+
+    def install_profile_signal(self):
+        """SIGUSR1 запускает профилирование следующих циклов с записью отчета в файл"""
+        if not hasattr(signal, 'SIGUSR1'):
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.start_profiling_from_signal)
+        except NotImplementedError:
+            pass
+
+    def start_profiling_from_signal(self):
+        """Обработчик SIGUSR1"""
+        if self.profiler.active:
+            print("[Профилирование] Уже запущено")
+            return
+        def report_saved(result):
+            _, path = result.result()
+            print(f"[Профилирование] Отчет сохранен в {path}")
+
+        self.profiler.start(PROFILE_TICKS, use_cprofile=True).add_done_callback(report_saved)
+        print(f"[Профилирование] Профилирование следующих {PROFILE_TICKS} циклов обновления")
+
+    async def close(self):
+        self.bus.stop()
+        self.save_snapshots.cancel()
+        self.server_state.save_state()
+        self.playtime.save_state()
+        if self.status_api:
+            await self.status_api.stop()
+        if self.notify_session:
+            await self.notify_session.close()
+        await super().close()
+
+    def track_content(self, server_id, server, message):
+        """Запоминает содержимое сообщения, возвращает False если после перезапуска оно не изменилось"""
+        content_hash = get_content_hash(message)
+        unchanged = server.warm_restart and content_hash == server.content_hash
+        server.warm_restart = False
+        server.content_hash = content_hash
+        if unchanged:
+            print(f"[Сервер {server_id}] Содержимое не изменилось после перезапуска, сообщение не обновляется")
+        return not unchanged
+
+    def publish_snapshot(self, server_id, server):
+        """Передает последний снимок сервера в HTTP API"""
+        if self.status_api:
+            self.status_api.publish(server_id, server.snapshot, server.roster, server.history)
+
+    async def deliver_status(self, server_id, message, server_name):
+        """Обновляет или отправляет сообщение со статусом сервера"""
+        if self.webhook:
+            await self.deliver_status_webhook(server_id, message, server_name)
+            return
+
+        channel = self.get_channel(STATUS_CHANNEL_ID)
+        stored_server_info = self.server_state.get_server_info(server_id)
+        if stored_server_info and stored_server_info.get("message_id"):
+            try:
+                print(f"[Сервер {server_id}] Попытка обновления существующего сообщения")
+                msg = await channel.fetch_message(int(stored_server_info["message_id"]))
+                await msg.edit(content=message)
+                print(f"[Сервер {server_id}] Сообщение успешно обновлено")
+            except (discord.NotFound, discord.HTTPException, discord.Forbidden):
+                print(f"[Сервер {server_id}] Сообщение не найдено, создаем новое")
+                new_message = await channel.send(message)
+                self.server_state.update_message_id(server_id, new_message.id)
+                print(f"[Сервер {server_id}] Новое сообщение создано")
+        else:
+            print(f"[Сервер {server_id}] Создание нового сообщения")
+            new_message = await channel.send(message)
+            self.server_state.add_server(server_id, new_message.id, channel.id, server_name)
+            print(f"[Сервер {server_id}] Новое сообщение создано")
+
+    async def deliver_status_webhook(self, server_id, message, server_name):
+        """Обновляет или отправляет сообщение со статусом через вебхук канала"""
+        stored_server_info = self.server_state.get_server_info(server_id)
+        webhook_message_id = stored_server_info.get("webhook_message_id") if stored_server_info else None
+        if webhook_message_id:
+            try:
+                # Сообщение вебхука редактируется по ID, без предварительного fetch_message
+                await self.webhook.edit_message(int(webhook_message_id), content=message)
+                print(f"[Сервер {server_id}] Сообщение вебхука обновлено")
+                return
+            except discord.NotFound:
+                print(f"[Сервер {server_id}] Сообщение вебхука не найдено, создаем новое")
+        new_message = await self.webhook.send(message, wait=True)
+        self.server_state.update_webhook_message_id(server_id, new_message.id, new_message.channel.id, server_name)
+        print(f"[Сервер {server_id}] Новое сообщение вебхука создано")
+
     def has_admin_role(self, user):
         """Проверяет наличие роли администратора у пользователя"""
         if not user.guild:
@@ -253,25 +919,11 @@ class GModBot(commands.Bot):
         return any(role.id == ADMIN_ROLE_ID for role in user.roles)
 
     async def check_server_status(self, server):
-        """Проверяет статус сервера и обновляет сообщение"""
-        channel = self.get_channel(STATUS_CHANNEL_ID)
-        if not channel:
-            print(f"[Ошибка] Не удалось найти канал {STATUS_CHANNEL_ID}")
-            return
-
+        """Опрашивает сервер и публикует снимок в шину событий"""
         server_id = self.get_server_id(server.address, server.port)
-        stored_server_info = self.server_state.get_server_info(server_id)
 
         print(f"[Сервер {server_id}] Начало проверки статуса")
         try:
-            # Инициализируем переменные для сообщения
-            message = "```ansi\n"
-            header = message + "╔════════════════════════════════════════════╗\n"
-            header += "║          \u001b[1;33mИнформация о сервере\u001b[0m              ║\n"
-            header += "╠════════════════════════════════════════════╣\n"
-            players_info = ""
-            footer = "╚════════════════════════════════════════════╝\n```"
-            
             # Добавляем счетчик попыток
             max_retries = 2
             retry_delay = 1  # секунды между попытками
@@ -279,167 +931,185 @@ class GModBot(commands.Bot):
             server_players = None
             
             # Пытаемся получить информацию о сервере
+            phase_start = self.profiler.start_phase()
             for attempt in range(max_retries):
                 try:
                     print(f"[Сервер {server_id}] Попытка {attempt + 1}/{max_retries} получения информации")
-                    socket.setdefaulttimeout(INFO_TIMEOUT)
+                    # Асинхронные запросы не блокируют цикл событий, пока сервер не отвечает
                     address = (server.address, server.port)
-                    server_info = a2s.info(address)
-                    
-                    socket.setdefaulttimeout(PLAYERS_TIMEOUT)
-                    server_players = a2s.players(address)
+                    server_info = await a2s.ainfo(address, timeout=INFO_TIMEOUT)
+                    server_players = await a2s.aplayers(address, timeout=PLAYERS_TIMEOUT)
                     
                     # Если успешно получили информацию, выходим из цикла
                     break
                     
-                except (socket.timeout, ConnectionRefusedError, OSError) as e:
+                except (asyncio.TimeoutError, socket.timeout, ConnectionRefusedError, OSError, a2s.BrokenMessageError) as e:
                     print(f"[Сервер {server_id}] Попытка {attempt + 1}/{max_retries} не удалась: {str(e)}")
                     if attempt < max_retries - 1:
                         await asyncio.sleep(retry_delay)
+            self.profiler.end_phase(server_id, 'a2s', phase_start)
             
             # Если не удалось получить информацию после всех попыток
             if server_info is None:
                 print(f"[Сервер {server_id}] Сервер недоступен после всех попыток")
-                server_url = server.get_server_url()
-                # Для оффлайн режима используем длинную рамку
-                message = "```ansi\n"
-                header = message + "╔═══════════════════════════════════════════════════════════════════════════════════╗\n"
-                header += "║                              \u001b[1;33mИнформация о сервере\u001b[0m                                 ║\n"
-                header += "╠═══════════════════════════════════════════════════════════════════════════════════╣\n"
-                header += f"║ \u001b[1;36mНазвание:\u001b[0m \u001b[1;34m{server_url}\u001b[0m\n"
-                header += f"║ \u001b[1;36mIP:\u001b[0m {server.address}:{server.port}\n"
-                header += f"║ \u001b[1;36mСтатус:\u001b[0m \u001b[1;31mОффлайн\u001b[0m\n"
-                header += "╠═══════════════════════════════════════════════════════════════════════════════════╣\n"
-                header += "║                                \u001b[1;33mСтатус сервера\u001b[0m                                     ║\n"
-                header += "╠═══════════════════════════════════════════════════════════════════════════════════╣\n"
-                header += "║ \u001b[1;31mСервер временно недоступен\u001b[0m\n"
-                header += f"║ \u001b[1;31mДанные были обновлены: {datetime.now(pytz.timezone('Europe/Moscow')).strftime('%H:%M:%S')}\u001b[0m\n"
-                footer = "╚═══════════════════════════════════════════════════════════════════════════════════╝\n```"
-                message = header + footer
-                
-                # Обновляем или отправляем сообщение
-                try:
-                    if stored_server_info and stored_server_info.get("message_id"):
-                        try:
-                            print(f"[Сервер {server_id}] Попытка обновления существующего сообщения")
-                            msg = await channel.fetch_message(int(stored_server_info["message_id"]))
-                            await msg.edit(content=message)
-                            print(f"[Сервер {server_id}] Сообщение успешно обновлено")
-                        except (discord.NotFound, discord.HTTPException, discord.Forbidden):
-                            print(f"[Сервер {server_id}] Сообщение не найдено, создаем новое")
-                            new_message = await channel.send(message)
-                            self.server_state.update_message_id(server_id, new_message.id)
-                            print(f"[Сервер {server_id}] Новое сообщение создано")
+                roster = PlayerRoster()
+                players_changed = False
+            else:
+                if server.rules_need_refresh(server_info.map_name):
+                    phase_start = self.profiler.start_phase()
+                    try:
+                        print(f"[Сервер {server_id}] Запрос правил сервера")
+                        rules = await a2s.arules((server.address, server.port), timeout=INFO_TIMEOUT)
+                    except (asyncio.TimeoutError, socket.timeout, ConnectionRefusedError, OSError, a2s.BrokenMessageError) as e:
+                        # Многие сервера не отвечают на A2S_RULES, не повторяем до истечения TTL
+                        print(f"[Сервер {server_id}] Не удалось получить правила: {str(e)}")
+                        server.postpone_rules_refresh(server_info.map_name)
                     else:
-                        print(f"[Сервер {server_id}] Создание нового сообщения")
-                        new_message = await channel.send(message)
-                        self.server_state.add_server(server_id, new_message.id, channel.id, server.server_name or "Неизвестный сервер")
-                        print(f"[Сервер {server_id}] Новое сообщение создано")
-                except Exception as e:
-                    print(f"[Сервер {server_id}] Ошибка при отправке сообщения об оффлайн статусе: {str(e)}")
-                return
-            
-            # Если мы здесь, значит успешно получили информацию
-            try:
-                player_count_changed = server.update_player_count(server_info.player_count)
-                change_message = ""
-                if player_count_changed:
-                    change_type = "➕" if server_info.player_count > server.last_player_count else "➖"
-                    change_message = f"║ \u001b[1;35m{change_type} Количество игроков изменилось\u001b[0m\n"
-                
-                header += f"║ \u001b[1;36mНазвание:\u001b[0m {server_info.server_name}\n"
-                header += f"║ \u001b[1;36mКарта:\u001b[0m {server_info.map_name}\n"
-                header += f"║ \u001b[1;32mIP:\u001b[0m {server.address}:{server.port}\n"
-                header += f"║ \u001b[1;32mИгроки:\u001b[0m {server_info.player_count}/{server_info.max_players}\n"
-                header += f"║ {server.format_time_since_change()}\n"
-                header += "╠════════════════════════════════════════════╣\n"
-                
+                        if server.update_rules(rules, server_info.map_name):
+                            print(f"[Сервер {server_id}] Правила сервера изменились")
+                    self.profiler.end_phase(server_id, 'a2s', phase_start)
+
+                players_changed = server.update_player_count(server_info.player_count)
                 server.update_server_name(server_info.server_name)
-                
-                if server_players:
-                    players_info += "║            \u001b[1;33mСписок игроков\u001b[0m                  ║\n"
-                    players_info += "╠════════════════════════════════════════════╣\n"
-                    valid_players = [p for p in server_players if p.name]
-                    if valid_players:
-                        sorted_players = sorted(valid_players, key=lambda x: x.duration, reverse=True)
-                        
-                        temp_players_info = ""
-                        displayed_count = 0
-                        remaining_players = len(sorted_players)
-                        
-                        for player in sorted_players:
-                            player_line = server.format_player_info(player)
-                            message_length = server.calculate_message_length(header, players_info + temp_players_info + player_line + change_message, footer)
-                            
-                            if message_length >= 1900 or displayed_count >= MAX_PLAYERS_SHOW:
-                                remaining_players = len(sorted_players) - displayed_count
-                                break
-                            
-                            temp_players_info += player_line
-                            displayed_count += 1
-                        
-                        players_info += temp_players_info
-                        
-                        if remaining_players > displayed_count:
-                            players_info += "╠════════════════════════════════════════════╣\n"
-                            players_info += f"║ \u001b[1;35mИ ещё {remaining_players - displayed_count} игроков\u001b[0m\n"
-                        
-                        if change_message:
-                            players_info += "║\n"
-                            players_info += change_message
-                    else:
-                        players_info += "║ \u001b[1;31mСервер пуст\u001b[0m\n"
-                else:
-                    players_info += "║ \u001b[1;31mСервер пуст\u001b[0m\n"
-                    
-            except Exception as e:
-                print(f"[Сервер {server_id}] Ошибка при обработке данных сервера: {str(e)}")
-                return
-            
-            message = header + players_info + footer
-            
-            # Обновляем или отправляем сообщение
-            try:
-                if stored_server_info and stored_server_info.get("message_id"):
-                    try:
-                        print(f"[Сервер {server_id}] Попытка обновления существующего сообщения")
-                        msg = await channel.fetch_message(int(stored_server_info["message_id"]))
-                        await msg.edit(content=message)
-                        print(f"[Сервер {server_id}] Сообщение успешно обновлено")
-                    except (discord.NotFound, discord.HTTPException, discord.Forbidden):
-                        print(f"[Сервер {server_id}] Сообщение не найдено, создаем новое")
-                        new_message = await channel.send(message)
-                        self.server_state.update_message_id(server_id, new_message.id)
-                        print(f"[Сервер {server_id}] Новое сообщение создано")
+                if server_players is None:
+                    # A2S_INFO ответил, а A2S_PLAYERS нет: показываем прежний список игроков
+                    print(f"[Сервер {server_id}] Не удалось получить список игроков")
+                    roster = server.roster
                 else:
-                    print(f"[Сервер {server_id}] Создание нового сообщения")
-                    new_message = await channel.send(message)
-                    self.server_state.add_server(server_id, new_message.id, channel.id, server_info.server_name)
-                    print(f"[Сервер {server_id}] Новое сообщение создано")
-            except Exception as e:
-                print(f"[Сервер {server_id}] Ошибка при отправке сообщения: {str(e)}")
+                    roster = PlayerRoster.from_players(server_players)
+
+            online = server_info is not None
+            players_unknown = online and server_players is None
+            changed = players_changed or online != server.online or roster.names != server.roster.names
+            server.online = online
+            server.roster = roster
+            # Дальше снимок обрабатывают подписчики шины, опрос их не ждет
+            self.bus.publish(ServerSnapshot(
+                server_id, server_info, roster, players_unknown, players_changed, changed, time.time()
+            ))
                 
         except Exception as e:
             print(f"[Сервер {server_id}] Ошибка при проверке статуса сервера: {str(e)}")
-            # Если произошла ошибка подключения к Discord, просто логируем и продолжаем
-            pass
+
+    async def render_status(self, snapshot):
+        """Подписчик шины: формирует сообщение со статусом и обновляет его в Discord"""
+        server_id = snapshot.server_id
+        server = self.servers.get(server_id)
+        if server is None:
+            return
+        if not self.webhook and not self.get_channel(STATUS_CHANNEL_ID):
+            print(f"[Ошибка] Не удалось найти канал {STATUS_CHANNEL_ID}")
+            return
+
+        phase_start = self.profiler.start_phase()
+        if snapshot.info is None:
+            message = server.render_offline_message()
+            server_name = server.server_name or "Неизвестный сервер"
+        else:
+            message = server.render_status_message(snapshot.info, snapshot.roster, snapshot.players_changed)
+            server_name = snapshot.info.server_name
+        self.profiler.end_phase(server_id, 'render', phase_start)
+
+        if not self.track_content(server_id, server, message):
+            return
+
+        # Обновляем или отправляем сообщение
+        phase_start = self.profiler.start_phase()
+        try:
+            await self.deliver_status(server_id, message, server_name)
+            # Хэш сохраняет тот, кто обновил сообщение: он должен соответствовать тому, что видно в Discord
+            self.server_state.update_snapshot(server_id, {"content_hash": server.content_hash})
+        except Exception as e:
+            print(f"[Сервер {server_id}] Ошибка при отправке сообщения: {str(e)}")
+        self.profiler.end_phase(server_id, 'discord', phase_start)
+
+    async def record_history(self, snapshot):
+        """Подписчик шины: история игроков и HTTP API"""
+        server = self.servers.get(snapshot.server_id)
+        if server is None:
+            return
+        server.record_snapshot(snapshot.info, snapshot.polled_at)
+        self.publish_snapshot(snapshot.server_id, server)
+
+    async def index_players(self, snapshot):
+        """Подписчик шины: индекс имен игроков и время игры"""
+        # Без списка игроков индекс и сессии остаются прежними до следующего опроса
+        if snapshot.server_id not in self.servers or snapshot.players_unknown:
+            return
+        self.player_index.update(snapshot.server_id, snapshot.roster.names)
+        # Неудачный опрос не завершает сессии игроков, иначе при следующем
+        # успешном опросе все время сессий было бы засчитано повторно
+        if snapshot.info is not None:
+            self.playtime.update(snapshot.server_id, snapshot.roster)
+
+    async def persist_snapshot(self, snapshot):
+        """Подписчик шины: данные сервера для быстрого перезапуска"""
+        server = self.servers.get(snapshot.server_id)
+        if server is None:
+            return
+        phase_start = self.profiler.start_phase()
+        # Снимок строится из полученного события, а не из server.snapshot, который
+        # заполняет подписчик history и который может отставать на цикл.
+        # В файл состояния снимки попадают при периодическом сохранении
+        status = server.build_snapshot(snapshot.info, snapshot.polled_at)
+        self.server_state.update_snapshot(snapshot.server_id, server.to_state(status))
+        self.profiler.end_phase(snapshot.server_id, 'state', phase_start)
+
+    async def notify_changes(self, snapshot):
+        """Подписчик шины: сообщает в канал уведомлений, когда сервер падает или снова доступен"""
+        server_id = snapshot.server_id
+        online = snapshot.info is not None
+        was_online = self.server_availability.get(server_id)
+        self.server_availability[server_id] = online
+        # Первый опрос после запуска только запоминает состояние сервера
+        if was_online is None or was_online == online:
+            return
+
+        server = self.servers.get(server_id)
+        if server is None:
+            return
+        name = server.server_name or server_id
+        if online:
+            message = f"🟢 Сервер {name} ({server_id}) снова доступен, игроков {snapshot.info.player_count}/{snapshot.info.max_players}"
+        else:
+            message = f"🔴 Сервер {name} ({server_id}) недоступен"
+        try:
+            await self.notify_webhook.send(message)
+            print(f"[Уведомление] Сервер {server_id} {'снова доступен' if online else 'недоступен'}")
+        except discord.HTTPException as e:
+            print(f"[Уведомление] Не удалось отправить уведомление для сервера {server_id}: {e}")
 
     async def on_ready(self):
         """Обработчик события готовности бота"""
         print(f'Бот {self.user} готов к работе!')
+        log_resource_usage("Запуск")
         activity = discord.Activity(type=discord.ActivityType.playing, name=BOT_STATUS)
         await self.change_presence(activity=activity)
 
-        # Восстанавливаем состояние серверов при запуске
+        self.restore_servers()
+
+    def restore_servers(self):
+        """Восстанавливает отслеживаемые сервера из файла состояния"""
         for server_id, server_info in self.server_state.get_all_servers().items():
             try:
                 address, port = server_id.split(':')
                 port = int(port)
                 success, _ = self.add_server(address, port)
                 if success:
+                    server = self.servers[server_id]
+                    server.restore_state(server_info.get("snapshot"))
+                    if server.snapshot:
+                        self.publish_snapshot(server_id, server)
                     print(f"[Восстановление] Сервер {server_id} успешно восстановлен")
             except Exception as e:
                 print(f"[Восстановление] Ошибка при восстановлении сервера {server_id}: {e}")
 
-bot = GModBot()
-bot.run(TOKEN)
+        # Разрешаем первый цикл обновления только после восстановления
+        self.servers_restored.set()
+
+if __name__ == '__main__':
+    bot = GModBot()
+    if DELIVERY_MODE == 'webhook':
+        asyncio.run(bot.run_headless())
+    else:
+        bot.run(TOKEN)
@@ -0,0 +1,113 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Set
+
+class ServerSnapshot(NamedTuple):
+    """Неизменяемый снимок сервера, который публикует опрос"""
+    server_id: str
+    info: Any  # ответ a2s.info или None, если сервер недоступен
+    roster: Any  # PlayerRoster
+    players_unknown: bool  # сервер ответил, но список игроков получить не удалось
+    players_changed: bool
+    changed: bool
+    polled_at: float
+
+Handler = Callable[[ServerSnapshot], Awaitable[None]]
+
+class Subscription:
+    """Очередь подписчика: для каждого сервера хранится только последний снимок,
+    поэтому ее размер ограничен количеством отслеживаемых серверов"""
+
+    def __init__(self, name: str, handler: Handler, workers: int, changes_only: bool):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.changes_only = changes_only
+        self.pending: "OrderedDict[str, ServerSnapshot]" = OrderedDict()
+        self.active: Set[str] = set()
+        self.coalesced = 0
+        self.wakeup: Optional[asyncio.Event] = None
+        self.idle: Optional[asyncio.Event] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self.wakeup = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    def put(self, snapshot: ServerSnapshot) -> None:
+        """Добавляет снимок без ожидания, заменяя еще не обработанный снимок того же сервера"""
+        if self.changes_only and not snapshot.changed:
+            return
+        pending = self.pending.get(snapshot.server_id)
+        if pending is not None:
+            self.coalesced += 1
+            # Флаги изменений не должны теряться при замене снимка более новым
+            snapshot = snapshot._replace(
+                players_changed=snapshot.players_changed or pending.players_changed,
+                changed=snapshot.changed or pending.changed
+            )
+        self.pending[snapshot.server_id] = snapshot
+        self.idle.clear()
+        self.wakeup.set()
+
+    def _take(self) -> Optional[ServerSnapshot]:
+        # Снимки одного сервера обрабатываются строго по очереди
+        for server_id in self.pending:
+            if server_id not in self.active:
+                self.active.add(server_id)
+                return self.pending.pop(server_id)
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            snapshot = self._take()
+            if snapshot is None:
+                if not self.active:
+                    self.idle.set()
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            try:
+                await self.handler(snapshot)
+            except Exception as e:
+                print(f"[Шина] Ошибка подписчика {self.name} для сервера {snapshot.server_id}: {e}")
+            finally:
+                self.active.discard(snapshot.server_id)
+                # Снимок этого сервера мог ждать, пока текущий обрабатывался
+                self.wakeup.set()
+
+class SnapshotBus:
+    """Внутренняя шина: опрос публикует снимки, подписчики обрабатывают их независимо"""
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+
+    def subscribe(self, name: str, handler: Handler, workers: int = 1, changes_only: bool = False) -> Subscription:
+        """Регистрирует подписчика; медленный подписчик не задерживает опрос и других подписчиков"""
+        subscription = Subscription(name, handler, workers, changes_only)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def start(self) -> None:
+        for subscription in self.subscriptions:
+            subscription.start()
+
+    def stop(self) -> None:
+        for subscription in self.subscriptions:
+            subscription.stop()
+
+    def publish(self, snapshot: ServerSnapshot) -> None:
+        for subscription in self.subscriptions:
+            subscription.put(snapshot)
+
+    async def join(self) -> None:
+        """Ждет, пока все подписчики обработают опубликованные снимки"""
+        for subscription in self.subscriptions:
+            await subscription.idle.wait()
\ No newline at end of file
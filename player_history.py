@@ -0,0 +1,32 @@
+from array import array
+from itertools import chain
+from typing import Iterator, Tuple
+
+class PlayerHistory:
+    """Кольцевой буфер истории игроков: время и количество в упакованных массивах"""
+
+    __slots__ = ('size', 'start', 'times', 'counts')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.start = 0
+        self.times = array('I')
+        self.counts = array('H')
+
+    def append(self, timestamp: int, count: int) -> None:
+        """Добавляет замер, вытесняя самый старый при заполненном буфере"""
+        if len(self.times) < self.size:
+            self.times.append(timestamp)
+            self.counts.append(count)
+        elif self.size:
+            self.times[self.start] = timestamp
+            self.counts[self.start] = count
+            self.start = (self.start + 1) % self.size
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Перебирает замеры от старых к новым как кортежи (время, количество игроков)"""
+        for i in chain(range(self.start, len(self.times)), range(self.start)):
+            yield self.times[i], self.counts[i]
\ No newline at end of file
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+FUZZY_THRESHOLD = 0.3
+
+def get_trigrams(text: str) -> Set[str]:
+    """Триграммы строки с отступами по краям, чтобы короткие имена тоже их имели"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PlayerIndex:
+    """Инвертированный индекс имен игроков по всем отслеживаемым серверам"""
+
+    def __init__(self):
+        self.server_players: Dict[str, Set[str]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.display_names: Dict[str, str] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+
+    def update(self, server_id: str, names: Iterable[str]) -> None:
+        """Обновляет индекс по новому списку игроков сервера, меняя только разницу"""
+        new_keys = {}
+        for name in names:
+            new_keys[name.casefold()] = name
+        old_keys = self.server_players.get(server_id, set())
+
+        for key in old_keys - new_keys.keys():
+            self._remove_posting(key, server_id)
+        for key, name in new_keys.items():
+            self.display_names[key] = name
+            if key not in old_keys:
+                self._add_posting(key, server_id)
+
+        if new_keys:
+            self.server_players[server_id] = set(new_keys)
+        else:
+            self.server_players.pop(server_id, None)
+
+    def remove(self, server_id: str) -> None:
+        """Удаляет всех игроков сервера из индекса"""
+        self.update(server_id, ())
+
+    def _add_posting(self, key: str, server_id: str) -> None:
+        servers = self.postings.get(key)
+        if servers is None:
+            servers = self.postings[key] = set()
+            for trigram in get_trigrams(key):
+                self.trigrams.setdefault(trigram, set()).add(key)
+        servers.add(server_id)
+
+    def _remove_posting(self, key: str, server_id: str) -> None:
+        servers = self.postings.get(key)
+        if servers is None:
+            return
+        servers.discard(server_id)
+        if servers:
+            return
+        # Игрока больше нет ни на одном сервере
+        del self.postings[key]
+        del self.display_names[key]
+        for trigram in get_trigrams(key):
+            keys = self.trigrams.get(trigram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.trigrams[trigram]
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, List[str]]]:
+        """Ищет игроков по подстроке без учета регистра, затем по похожести триграмм"""
+        query = query.casefold().strip()
+        if not query:
+            return []
+
+        query_trigrams = {query[i:i + 3] for i in range(len(query) - 2)}
+        if query_trigrams:
+            candidates = set.intersection(*(self.trigrams.get(t, set()) for t in query_trigrams))
+        else:
+            candidates = self.postings.keys()
+        matches = sorted(key for key in candidates if query in key)
+
+        if len(matches) < limit:
+            padded_trigrams = get_trigrams(query)
+            scores: Dict[str, int] = {}
+            for trigram in padded_trigrams:
+                for key in self.trigrams.get(trigram, ()):
+                    scores[key] = scores.get(key, 0) + 1
+            found = set(matches)
+            fuzzy = []
+            for key, shared in scores.items():
+                if key in found:
+                    continue
+                # Доля триграмм запроса, найденных в имени: опечатка в части длинного
+                # имени не должна обнулять совпадение
+                similarity = shared / len(padded_trigrams)
+                if similarity >= FUZZY_THRESHOLD:
+                    fuzzy.append((similarity, key))
+            fuzzy.sort(key=lambda item: (-item[0], item[1]))
+            matches += [key for _, key in fuzzy]
+
+        return [
+            (self.display_names[key], sorted(self.postings[key]))
+            for key in matches[:limit]
+        ]
\ No newline at end of file
@@ -0,0 +1,30 @@
+import sys
+from array import array
+from typing import Iterable, Iterator, Tuple
+
+class PlayerRoster:
+    """Компактный список игроков: интернированные имена, счет и время в упакованных массивах"""
+
+    __slots__ = ('names', 'scores', 'durations')
+
+    def __init__(self, names: Iterable[str] = (), scores: Iterable[int] = (), durations: Iterable[float] = ()):
+        self.names: Tuple[str, ...] = tuple(names)
+        self.scores = array('i', scores)
+        self.durations = array('f', durations)
+
+    @classmethod
+    def from_players(cls, players) -> "PlayerRoster":
+        """Создает список из ответа a2s.players, пропуская игроков без имени"""
+        valid_players = sorted((p for p in players if p.name), key=lambda p: p.duration, reverse=True)
+        return cls(
+            (sys.intern(p.name) for p in valid_players),
+            (p.score for p in valid_players),
+            (p.duration for p in valid_players)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Tuple[str, int, float]]:
+        """Перебирает игроков как кортежи (имя, счет, время в секундах)"""
+        return zip(self.names, self.scores, self.durations)
\ No newline at end of file
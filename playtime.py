@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+ALL_SERVERS = "*"
+
+class PlaytimeTracker:
+    """Накопленное время игры по игрокам на основе последовательных списков игроков"""
+
+    def __init__(self, state_file: str = "playtime_state.json", top_size: int = 25):
+        self.state_file = state_file
+        self.top_size = top_size
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.sessions: Dict[str, Dict[str, List[float]]] = {}
+        self.top: Dict[str, List[str]] = {}
+        self.dirty = False
+        self.load_state()
+
+    def load_state(self) -> None:
+        """Загружает накопленное время из JSON файла"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            print("Ошибка при чтении файла времени игры. Создаем новый.")
+            return
+        for key, players in data.get("totals", {}).items():
+            self.totals[key] = {sys.intern(name): float(seconds) for name, seconds in players.items()}
+            for name in self.totals[key]:
+                self._update_top(key, name)
+        for server_id, players in data.get("sessions", {}).items():
+            self.sessions[server_id] = {
+                sys.intern(name): sorted((float(duration) for duration in durations), reverse=True)
+                for name, durations in players.items()
+            }
+
+    def save_state(self) -> None:
+        """Сохраняет накопленное время в JSON файл, если оно изменилось"""
+        if not self.dirty:
+            return
+        data = {
+            "saved_at": datetime.now().isoformat(),
+            "totals": {key: {name: int(seconds) for name, seconds in players.items()} for key, players in self.totals.items()},
+            "sessions": {
+                server_id: {name: [int(duration) for duration in durations] for name, durations in players.items()}
+                for server_id, players in self.sessions.items()
+            }
+        }
+        # Как и файл состояния серверов, заменяем файл целиком после записи
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_file, self.state_file)
+        self.dirty = False
+
+    def update(self, server_id: str, roster) -> None:
+        """Добавляет время, прошедшее с прошлого списка игроков сервера"""
+        previous = self.sessions.get(server_id, {})
+        # Имена в A2S не уникальны, поэтому у одного имени может быть несколько сессий
+        current: Dict[str, List[float]] = {}
+        for name, _, duration in roster:
+            current.setdefault(name, []).append(duration)
+
+        for name, durations in current.items():
+            durations.sort(reverse=True)
+            last_durations = previous.get(name, [])
+            last_index = 0
+            for duration in durations:
+                # Сессии, которые длиннее текущей, уже закончились: игрок вышел,
+                # перезашел или сервер перезапустился
+                while last_index < len(last_durations) and last_durations[last_index] > duration + 1:
+                    last_index += 1
+                if last_index < len(last_durations):
+                    played = duration - last_durations[last_index]
+                    last_index += 1
+                else:
+                    played = duration
+                if played > 0:
+                    self._add(server_id, name, played)
+                    self._add(ALL_SERVERS, name, played)
+
+        if current:
+            self.sessions[server_id] = current
+        else:
+            self.sessions.pop(server_id, None)
+        if current or previous:
+            self.dirty = True
+
+    def _add(self, key: str, name: str, seconds: float) -> None:
+        players = self.totals.setdefault(key, {})
+        players[name] = players.get(name, 0.0) + seconds
+        self._update_top(key, name)
+
+    def _update_top(self, key: str, name: str) -> None:
+        """Обновляет топ; время только растет, поэтому достаточно проверить изменившегося игрока"""
+        top = self.top.setdefault(key, [])
+        totals = self.totals[key]
+        if name not in top:
+            if len(top) >= self.top_size and totals[name] <= totals[top[-1]]:
+                return
+            top.append(name)
+        top.sort(key=lambda player: totals[player], reverse=True)
+        del top[self.top_size:]
+
+    def get_top(self, server_id: str = ALL_SERVERS, count: int = 10) -> List[Tuple[str, float]]:
+        """Возвращает игроков с наибольшим временем игры"""
+        totals = self.totals.get(server_id, {})
+        return [(name, totals[name]) for name in self.top.get(server_id, [])[:count]]
\ No newline at end of file
@@ -23,17 +23,36 @@ class ServerState:
 
     def save_state(self) -> None:
         """Сохраняет состояние в JSON файл"""
-        with open(self.state_file, 'w', encoding='utf-8') as f:
+        # Пишем во временный файл и заменяем им основной, чтобы сбой во время
+        # записи не оставил обрезанный файл и не потерял все сервера
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
             json.dump(self.servers, f, indent=4, ensure_ascii=False)
+        os.replace(temp_file, self.state_file)
 
     def add_server(self, server_id: str, message_id: int, channel_id: int, server_name: str) -> None:
         """Добавляет или обновляет информацию о сервере"""
-        self.servers[server_id] = {
+        # Обновляем запись, не теряя данные другого режима доставки
+        self.servers.setdefault(server_id, {}).update({
             "message_id": str(message_id),
             "channel_id": str(channel_id),
             "server_name": server_name,
             "last_update": datetime.now().isoformat()
-        }
+        })
+        self.save_state()
+
+    def register_servers(self, servers: Dict[str, str], channel_id: int) -> None:
+        """Регистрирует несколько серверов без сообщений за одну запись файла"""
+        now = datetime.now().isoformat()
+        for server_id, server_name in servers.items():
+            if server_id in self.servers:
+                continue
+            self.servers[server_id] = {
+                "message_id": None,
+                "channel_id": str(channel_id),
+                "server_name": server_name,
+                "last_update": now
+            }
         self.save_state()
 
     def remove_server(self, server_id: str) -> None:
@@ -53,6 +72,23 @@ class ServerState:
             self.servers[server_id]["last_update"] = datetime.now().isoformat()
             self.save_state()
 
+    def update_webhook_message_id(self, server_id: str, message_id: int, channel_id: int, server_name: str) -> None:
+        """Сохраняет ID сообщения, отправленного через вебхук"""
+        if server_id not in self.servers:
+            self.servers[server_id] = {
+                "message_id": None,
+                "channel_id": str(channel_id),
+                "server_name": server_name
+            }
+        self.servers[server_id]["webhook_message_id"] = str(message_id)
+        self.servers[server_id]["last_update"] = datetime.now().isoformat()
+        self.save_state()
+
+    def update_snapshot(self, server_id: str, snapshot: dict) -> None:
+        """Дополняет последний снимок сервера без записи файла"""
+        if server_id in self.servers:
+            self.servers[server_id].setdefault("snapshot", {}).update(snapshot)
+
     def get_all_servers(self) -> Dict[str, dict]:
         """Возвращает информацию о всех серверах"""
         return self.servers.copy() 
\ No newline at end of file
@@ -0,0 +1,106 @@
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+# Поля снимка, которые меняются при каждом опросе и сами по себе не делают ответ новым
+VOLATILE_FIELDS = ('updated_at',)
+
+class StatusAPI:
+    """Локальный HTTP API только для чтения поверх закэшированных снимков серверов"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.servers: Dict[str, tuple] = {}
+        self.documents: Dict[str, Tuple[bytes, str]] = {}
+        self.runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/servers', self.handle_servers)
+        self.app.router.add_get('/servers/{server_id}', self.handle_server)
+        self.app.router.add_get('/servers/{server_id}/history', self.handle_history)
+
+    async def start(self) -> None:
+        """Запускает HTTP сервер"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self) -> None:
+        """Останавливает HTTP сервер"""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def publish(self, server_id: str, snapshot: dict, roster, history) -> None:
+        """Сохраняет новый снимок сервера и сбрасывает только те ответы, содержимое которых изменилось"""
+        previous = self.servers.get(server_id)
+        if previous is not None and self._stable(previous[0]) == self._stable(snapshot):
+            # Прежний снимок остается вместе с закэшированным /servers и его ETag
+            snapshot = previous[0]
+        else:
+            self.documents.pop('/servers', None)
+        if previous is None or snapshot is not previous[0] or roster is not previous[1]:
+            self.documents.pop(f'/servers/{server_id}', None)
+        # В историю каждый опрос добавляет замер
+        self.documents.pop(f'/servers/{server_id}/history', None)
+        self.servers[server_id] = (snapshot, roster, history)
+
+    def forget(self, server_id: str) -> None:
+        """Удаляет сервер из API"""
+        self.servers.pop(server_id, None)
+        self._invalidate(server_id)
+
+    @staticmethod
+    def _stable(snapshot: dict) -> dict:
+        return {key: value for key, value in snapshot.items() if key not in VOLATILE_FIELDS}
+
+    def _invalidate(self, server_id: str) -> None:
+        self.documents.pop('/servers', None)
+        self.documents.pop(f'/servers/{server_id}', None)
+        self.documents.pop(f'/servers/{server_id}/history', None)
+
+    def _document(self, path: str, build) -> Tuple[bytes, str]:
+        """Возвращает JSON ответ и его ETag, собирая их только после изменения данных"""
+        document = self.documents.get(path)
+        if document is None:
+            body = json.dumps(build(), ensure_ascii=False).encode('utf-8')
+            document = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+            self.documents[path] = document
+        return document
+
+    def _respond(self, request: web.Request, path: str, build) -> web.Response:
+        body, etag = self._document(path, build)
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, content_type='application/json', charset='utf-8', headers={'ETag': etag})
+
+    async def handle_servers(self, request: web.Request) -> web.Response:
+        """Снимки всех отслеживаемых серверов"""
+        return self._respond(request, '/servers', lambda: {
+            server_id: snapshot for server_id, (snapshot, _, _) in self.servers.items()
+        })
+
+    async def handle_server(self, request: web.Request) -> web.Response:
+        """Снимок сервера вместе со списком игроков"""
+        server_id = request.match_info['server_id']
+        if server_id not in self.servers:
+            raise web.HTTPNotFound()
+        snapshot, roster, _ = self.servers[server_id]
+        return self._respond(request, f'/servers/{server_id}', lambda: dict(snapshot, roster=[
+            {'name': name, 'score': score, 'duration': int(duration)}
+            for name, score, duration in roster
+        ]))
+
+    async def handle_history(self, request: web.Request) -> web.Response:
+        """История количества игроков на сервере"""
+        server_id = request.match_info['server_id']
+        if server_id not in self.servers:
+            raise web.HTTPNotFound()
+        _, _, history = self.servers[server_id]
+        return self._respond(request, f'/servers/{server_id}/history', lambda: [
+            {'time': timestamp, 'players': players} for timestamp, players in history
+        ])
\ No newline at end of file
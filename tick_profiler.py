@@ -0,0 +1,112 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+PHASES = ('a2s', 'render', 'discord', 'state')
+
+class TickProfiler:
+    """Профилирование следующих циклов обновления: время по фазам для каждого сервера и cProfile"""
+
+    def __init__(self):
+        self.result: Optional[asyncio.Future] = None
+        self.session = 0
+        self.recording = False
+        self.ticks_left = 0
+        self.pending_ticks = 0
+        self.profile: Optional[cProfile.Profile] = None
+        self.phases: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.tick_durations: List[float] = []
+
+    @property
+    def active(self) -> bool:
+        return self.result is not None
+
+    def start(self, ticks: int, use_cprofile: bool = False) -> asyncio.Future:
+        """Запускает профилирование, результат - кортеж (отчет, путь к файлу)"""
+        self.ticks_left = ticks
+        self.pending_ticks = 0
+        self.profile = cProfile.Profile() if use_cprofile else None
+        self.phases = defaultdict(lambda: defaultdict(float))
+        self.tick_durations = []
+        self.session += 1
+        self.result = asyncio.get_running_loop().create_future()
+        return self.result
+
+    def cancel(self) -> None:
+        """Прерывает профилирование без отчета"""
+        if self.profile and self.recording:
+            self.profile.disable()
+        self.session += 1
+        self.result = None
+        self.recording = False
+        self.profile = None
+
+    def begin_tick(self) -> Optional[Tuple[int, float]]:
+        """Отмечает начало цикла, возвращает (сессия, время начала) если цикл профилируется"""
+        if not self.active or self.ticks_left <= 0:
+            return None
+        if self.profile and not self.recording:
+            self.profile.enable()
+        self.recording = True
+        self.ticks_left -= 1
+        self.pending_ticks += 1
+        return self.session, time.perf_counter()
+
+    def finish_tick(self, tick: Tuple[int, float]) -> None:
+        """Отмечает завершение цикла и формирует отчет после последнего цикла"""
+        session, started = tick
+        # Циклы прерванной или предыдущей сессии не должны влиять на текущую
+        if not self.active or session != self.session:
+            return
+        self.tick_durations.append(time.perf_counter() - started)
+        self.pending_ticks -= 1
+        if self.ticks_left == 0 and self.pending_ticks == 0:
+            self._finish()
+
+    def start_phase(self) -> Optional[float]:
+        return time.perf_counter() if self.recording else None
+
+    def end_phase(self, server_id: str, phase: str, started: Optional[float]) -> None:
+        if started is not None and self.recording:
+            self.phases[server_id][phase] += time.perf_counter() - started
+
+    def _finish(self) -> None:
+        if self.profile:
+            self.profile.disable()
+        summary = self.format_summary()
+        path = f"tick_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(summary)
+        result = self.result
+        self.result = None
+        self.recording = False
+        self.profile = None
+        result.set_result((summary, path))
+
+    def format_summary(self) -> str:
+        """Отчет: длительность циклов, время по фазам и самые затратные функции"""
+        durations = ", ".join(f"{duration:.2f}" for duration in self.tick_durations)
+        lines = [
+            f"Профилирование циклов обновления: {len(self.tick_durations)}",
+            f"Длительность циклов с учетом сдвигов опроса, сек.: {durations}",
+            "",
+            f"Время по фазам, сек. ({' / '.join(PHASES)}):"
+        ]
+        totals = defaultdict(float)
+        for phases in self.phases.values():
+            for phase, seconds in phases.items():
+                totals[phase] += seconds
+        lines.append("Всего: " + " / ".join(f"{totals[phase]:.3f}" for phase in PHASES))
+        for server_id, phases in sorted(self.phases.items(), key=lambda item: -sum(item[1].values())):
+            lines.append(f"{server_id}: " + " / ".join(f"{phases[phase]:.3f}" for phase in PHASES))
+
+        if self.profile:
+            stream = io.StringIO()
+            pstats.Stats(self.profile, stream=stream).sort_stats('cumulative').print_stats(20)
+            lines += ["", "Самые затратные функции (cProfile):", stream.getvalue()]
+        return "\n".join(lines)
\ No newline at end of file